@@ -1,8 +1,21 @@
 import streamlit as st
-import requests
+import asyncio
+import functools
+import httpx
+import itertools
+import orjson
 import pandas as pd
-import time
-from io import StringIO
+import pyarrow as pa
+import pyarrow.parquet as pq
+from aiolimiter import AsyncLimiter
+from diskcache import Cache
+from io import BytesIO
+from urllib.parse import quote_plus
+
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
 
 st.set_page_config(page_title="Voice Autocomplete Scraper", page_icon="🎤", layout="wide")
 
@@ -19,7 +32,7 @@ with st.expander("📖 How to Use & Option Definitions", expanded=False):
     3. **Choose variant options** - select which exploration methods to use (letters, wildcards, questions)
     4. **Set position options** - decide where to place variants (prefix, infix, suffix)
     5. **Click "Run Scraper"** - the tool will generate variants and fetch suggestions from Google
-    6. **Download results** - export your findings as a CSV file
+    6. **Download results** - export your findings as a CSV or Parquet file
     
     ---
     
@@ -64,7 +77,8 @@ with st.expander("📖 How to Use & Option Definitions", expanded=False):
     - Start with both Letters and Wildcards enabled in Suffix position for quick, high-value results
     - Try action verbs as seeds: "hey google set", "hey google play", "ok google call"
     - Run multiple passes with different Language/Region combos to find regional variations
-    - The tool adds a small delay between requests to be polite to Google's API
+    - The tool rate-limits its requests to be polite to Google's API
+    - Suggestions are cached for 24 hours, so re-running the same seeds and locale is near-instant
     """)
     
 st.markdown("---")
@@ -107,129 +121,269 @@ ALPHABET = list('abcdefghijklmnopqrstuvwxyz')
 QUESTION_WORDS = ['how', 'what', 'why', 'when', 'where', 'who', 'which', 'can', 'should', 'will', 'do', 'does', 'is']
 CONNECTORS = ['']
 
-def fetch_suggestions(query, lang, gl):
-    """Fetch suggestions from Google Suggest API"""
-    try:
-        url = f"https://suggestqueries.google.com/complete/search"
-        params = {
-            'client': 'firefox',
-            'hl': lang,
-            'gl': gl,
-            'q': query
-        }
-        response = requests.get(url, params=params, timeout=5)
-        data = response.json()
-        return data[1] if len(data) > 1 else []
-    except Exception as e:
-        st.warning(f"Error fetching suggestions for '{query}': {str(e)}")
-        return []
+# Variant templates per filler kind and position: {f} is the filler, {s} the seed,
+# {h}/{t} the seed's first word and the rest of it (infix only)
+SPACED_TEMPLATES = {
+    'prefix': ['{f} {s}'],
+    'infix': ['{h} {f} {t}'],
+    'suffix': ['{s} {f}'],
+}
+WILDCARD_TEMPLATES = {
+    'prefix': ['{f}*{s}', '{f} *{s}'],  # n*hey google, n *hey google
+    'infix': ['{h}*{f} {t}', '{h} {f}*{t}'],  # hey*n google, hey n*google
+    'suffix': ['{s}*{f}', '{s} {f}*'],  # hey google*n, hey google n*
+}
+VARIANT_TEMPLATES = {
+    'letter': SPACED_TEMPLATES,
+    'wildcard': SPACED_TEMPLATES,
+    'letter_wildcard': WILDCARD_TEMPLATES,
+    'question': {
+        'prefix': [f"{{f}}{conn}{{s}}" for conn in CONNECTORS],
+        'suffix': [f"{{s}}{conn}{{f}}" for conn in CONNECTORS],
+    },
+    'question_wildcard': {
+        'prefix': WILDCARD_TEMPLATES['prefix'],
+        'suffix': WILDCARD_TEMPLATES['suffix'],
+    },
+}
+
+SUGGEST_URL = "https://suggestqueries.google.com/complete/search"
+MAX_CONNECTIONS = 20
+MAX_REQUESTS_PER_SECOND = 20
+KEEPALIVE_TIMEOUT = 30
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.5
+MAX_RETRY_DELAY = 10
+RETRY_STATUSES = {429, 502, 503, 504}
+CACHE_DIR = "./.suggest_cache"
+CACHE_TTL = 24 * 60 * 60
+PREVIEW_EVERY = 25
+PREVIEW_ROWS = 500
+
+@st.cache_resource
+def get_suggest_cache():
+    """Open the on-disk suggestion cache once per process"""
+    return Cache(CACHE_DIR)
+
+def retry_delay(response, attempt):
+    """Honour a numeric Retry-After header (capped), otherwise back off exponentially"""
+    retry_after = response.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return min(int(retry_after), MAX_RETRY_DELAY)
+    return RETRY_BACKOFF * 2 ** attempt
+
+@functools.lru_cache(maxsize=None)
+def suggest_base_url(lang, gl):
+    """Build the Suggest URL with the static params encoded once; only the query is appended"""
+    return f"{SUGGEST_URL}?client=firefox&hl={quote_plus(lang)}&gl={quote_plus(gl)}&q="
+
+async def fetch_suggestions(client, limiter, cache, query, lang, gl):
+    """Fetch suggestions from Google Suggest API, serving repeats from the disk cache"""
+    key = (query, lang, gl)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    
+    url = suggest_base_url(lang, gl) + quote_plus(query)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            # Be polite to the API: bursts are allowed up to a sustained request rate
+            async with limiter:
+                response = await client.get(url)
+        except httpx.TransportError:
+            if attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+            continue
+        
+        # Rate-limit and gateway errors come back as HTML, so don't try to parse them
+        if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            await asyncio.sleep(retry_delay(response, attempt))
+            continue
+        response.raise_for_status()
+        # orjson only reads UTF-8 bytes; other charsets (e.g. ISO-8859-1 for some hl values) go through text
+        if response.encoding.lower().replace('_', '-') in ('utf-8', 'utf8'):
+            data = orjson.loads(response.content)
+        else:
+            data = orjson.loads(response.text)
+        break
+    
+    suggestions = data[1] if len(data) > 1 else []
+    cache.set(key, suggestions, expire=CACHE_TTL)
+    return suggestions
 
 def generate_variants(seed, use_letters, use_wildcards, use_questions, 
                      use_prefix, use_infix, use_suffix):
     """Generate query variants from a seed"""
-    variants = {seed}  # Start with base seed
-    
+    words = seed.split(' ')
+    head, tail = words[0], ' '.join(words[1:])
+    
+    positions = [
+        pos for pos, enabled in (
+            ('prefix', use_prefix),
+            ('infix', use_infix and len(words) > 1),
+            ('suffix', use_suffix),
+        ) if enabled
+    ]
+    
+    fillers = []
     if use_letters:
-        for letter in ALPHABET:
-            if use_prefix:
-                variants.add(f"{letter} {seed}")
-            if use_suffix:
-                variants.add(f"{seed} {letter}")
-            if use_infix:
-                words = seed.split(' ')
-                if len(words) > 1:
-                    variants.add(f"{words[0]} {letter} {' '.join(words[1:])}")
-            
-            # Add wildcard+letter combos when both are enabled
-            if use_wildcards:
-                if use_suffix:
-                    variants.add(f"{seed}*{letter}")  # hey google*n
-                    variants.add(f"{seed} {letter}*")  # hey google n*
-                if use_prefix:
-                    variants.add(f"{letter}*{seed}")  # n*hey google
-                    variants.add(f"{letter} *{seed}")  # n *hey google
-                if use_infix:
-                    words = seed.split(' ')
-                    if len(words) > 1:
-                        variants.add(f"{words[0]}*{letter} {' '.join(words[1:])}")
-                        variants.add(f"{words[0]} {letter}*{' '.join(words[1:])}")
-    
+        fillers.append(('letter', ALPHABET))
     if use_wildcards:
-        if use_prefix:
-            variants.add(f"* {seed}")
-        if use_suffix:
-            variants.add(f"{seed} *")
-        if use_infix:
-            words = seed.split(' ')
-            if len(words) > 1:
-                variants.add(f"{words[0]} * {' '.join(words[1:])}")
-    
+        fillers.append(('wildcard', ['*']))
+    if use_letters and use_wildcards:
+        fillers.append(('letter_wildcard', ALPHABET))
     if use_questions:
-        for qw in QUESTION_WORDS:
-            for conn in CONNECTORS:
-                if use_prefix:
-                    variants.add(f"{qw}{conn}{seed}")
-                if use_suffix:
-                    variants.add(f"{seed}{conn}{qw}")
-            
-            # Add wildcard+question combos when both are enabled
-            if use_wildcards:
-                if use_suffix:
-                    variants.add(f"{seed}*{qw}")  # hey google*what
-                    variants.add(f"{seed} {qw}*")  # hey google what*
-                if use_prefix:
-                    variants.add(f"{qw}*{seed}")  # what*hey google
-                    variants.add(f"{qw} *{seed}")  # what *hey google
-    
-    return list(variants)
+        fillers.append(('question', QUESTION_WORDS))
+    if use_questions and use_wildcards:
+        fillers.append(('question_wildcard', QUESTION_WORDS))
+    
+    def bind(template):
+        """Fill in the seed parts once, leaving the text on either side of {f}"""
+        left, right = template.split('{f}')
+        return left.format(s=seed, h=head, t=tail), right.format(s=seed, h=head, t=tail)
+    
+    # One stream per (kind, position, template)
+    streams = [
+        [left + filler + right for filler in items]
+        for (kind, items), pos in itertools.product(fillers, positions)
+        for left, right in map(bind, VARIANT_TEMPLATES[kind].get(pos, ()))
+    ]
+    
+    # Dict keys dedupe like a set but keep insertion order. Taking one variant
+    # from each stream in turn keeps the order deterministic while letting a
+    # max_per_variant cap still sample every enabled kind and position
+    variants = {seed: None}  # Start with base seed
+    variants.update(dict.fromkeys(
+        variant
+        for batch in itertools.zip_longest(*streams)
+        for variant in batch
+        if variant is not None
+    ))
+    
+    return tuple(variants)
 
-def run_scraper(seeds_list, lang, gl, max_per_variant, use_letters, use_wildcards,
-                use_questions, use_prefix, use_infix, use_suffix):
-    """Main scraper logic"""
-    all_results = []
+async def _async_run_scraper(seeds_list, lang, gl, max_per_variant, use_letters, use_wildcards,
+                             use_questions, use_prefix, use_infix, use_suffix):
+    """Fetch each unique variant once over a shared client and fan results out to seeds"""
+    seeds_col, variants_col, queries_col, suggestions_col = [], [], [], []
     seen = set()
     
     progress_bar = st.progress(0)
     status_text = st.empty()
+    preview = st.empty()
     
     total_seeds = len(seeds_list)
+    limiter = AsyncLimiter(MAX_REQUESTS_PER_SECOND, time_period=1.0)
+    cache = get_suggest_cache()
     
-    for seed_idx, seed in enumerate(seeds_list):
+    # Variants that collide across seeds are only fetched once
+    variant_to_seeds = {}
+    for seed in seeds_list:
         variants = generate_variants(
             seed, use_letters, use_wildcards, use_questions,
             use_prefix, use_infix, use_suffix
+        )[:max_per_variant]
+        for variant in variants:
+            variant_to_seeds.setdefault(variant, []).append(seed)
+    
+    unique_variants = list(variant_to_seeds)
+    total_variants = len(unique_variants)
+    
+    def refresh_preview():
+        """Show the most recent rows while the scrape runs"""
+        preview.dataframe(
+            pd.DataFrame({
+                'seed': seeds_col[-PREVIEW_ROWS:],
+                'variant': variants_col[-PREVIEW_ROWS:],
+                'suggestion': suggestions_col[-PREVIEW_ROWS:]
+            }),
+            use_container_width=True,
+            height=400
         )
+    
+    status_text.text(f"Fetching {total_variants} unique variants for {total_seeds} seeds...")
+    
+    # One HTTP/2 client per run so variants multiplex over pooled keep-alive connections
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_TIMEOUT
+    )
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=5.0) as client:
+        async def fetch_variant(index, variant):
+            try:
+                return index, await fetch_suggestions(client, limiter, cache, variant, lang, gl)
+            except Exception as e:
+                return index, e
         
-        count = 0
-        for variant in variants:
-            if count >= max_per_variant:
-                break
-            
-            status_text.text(f"Processing seed {seed_idx + 1}/{total_seeds}: '{seed}' | Variant: '{variant}' ({count + 1}/{max_per_variant})")
-            
-            suggestions = fetch_suggestions(variant, lang, gl)
+        # Progress advances as fetches complete, but results are released in
+        # unique_variants order so the variant credited for each suggestion is stable
+        tasks = [fetch_variant(index, variant) for index, variant in enumerate(unique_variants)]
+        finished = {}
+        next_index = 0
+        for completed, next_result in enumerate(asyncio.as_completed(tasks), start=1):
+            index, suggestions = await next_result
+            finished[index] = suggestions
+            progress_bar.progress(completed / total_variants)
             
-            for suggestion in suggestions:
-                key = f"{seed}|||{suggestion}"
-                if key not in seen:
-                    seen.add(key)
-                    all_results.append({
-                        'seed': seed,
-                        'variant': variant,
-                        'query_sent': variant,
-                        'suggestion': suggestion
-                    })
+            while next_index in finished:
+                variant = unique_variants[next_index]
+                suggestions = finished.pop(next_index)
+                next_index += 1
+                
+                if isinstance(suggestions, Exception):
+                    st.warning(f"Error fetching suggestions for '{variant}': {str(suggestions)}")
+                    continue
+                
+                for seed in variant_to_seeds[variant]:
+                    for suggestion in suggestions:
+                        key = (seed, suggestion)
+                        if key not in seen:
+                            seen.add(key)
+                            seeds_col.append(seed)
+                            variants_col.append(variant)
+                            queries_col.append(variant)
+                            suggestions_col.append(suggestion)
             
-            count += 1
-            progress_bar.progress((seed_idx + count / max_per_variant) / total_seeds)
-            
-            # Be polite to the API
-            time.sleep(0.1)
+            if completed % PREVIEW_EVERY == 0:
+                refresh_preview()
+    
+    preview.empty()
+    
+    results_df = pd.DataFrame({
+        'seed': seeds_col,
+        'variant': variants_col,
+        'query_sent': queries_col,
+        'suggestion': suggestions_col
+    }, copy=False)
     
     progress_bar.progress(1.0)
-    status_text.text(f"✅ Complete! Found {len(all_results)} unique suggestions.")
+    status_text.text(f"✅ Complete! Found {len(results_df)} unique suggestions.")
     
-    return pd.DataFrame(all_results)
+    return results_df
+
+@st.cache_data
+def to_csv_bytes(df):
+    """Serialize results for download once per distinct DataFrame"""
+    return df.to_csv(index=False).encode('utf-8')
+
+@st.cache_data
+def to_parquet_bytes(df):
+    """Serialize results as zstd-compressed Parquet once per distinct DataFrame"""
+    buf = BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buf, compression='zstd')
+    return buf.getvalue()
+
+def run_scraper(seeds_list, lang, gl, max_per_variant, use_letters, use_wildcards,
+                use_questions, use_prefix, use_infix, use_suffix):
+    """Main scraper logic"""
+    run = uvloop.run if uvloop is not None else asyncio.run
+    return run(_async_run_scraper(
+        seeds_list, lang, gl, max_per_variant,
+        use_letters, use_wildcards, use_questions,
+        use_prefix, use_infix, use_suffix
+    ))
 
 # Main action button
 if st.button("🔍 Run Scraper", type="primary", use_container_width=True):
@@ -256,15 +410,24 @@ if 'results_df' in st.session_state and not st.session_state['results_df'].empty
     
     st.success(f"Found {len(df)} unique suggestions!")
     
-    # Download button
-    csv = df.to_csv(index=False)
-    st.download_button(
-        label="📥 Download CSV",
-        data=csv,
-        file_name="voice_autocomplete_results.csv",
-        mime="text/csv",
-        use_container_width=True
-    )
+    # Download buttons; files are only built when a button is clicked
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📥 Download CSV",
+            data=lambda: to_csv_bytes(df),
+            file_name="voice_autocomplete_results.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+    with col2:
+        st.download_button(
+            label="📥 Download Parquet",
+            data=lambda: to_parquet_bytes(df),
+            file_name="voice_autocomplete_results.parquet",
+            mime="application/octet-stream",
+            use_container_width=True
+        )
     
     # Display results table
     st.subheader("Results Preview")